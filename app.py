@@ -1,28 +1,35 @@
 # app.py (refactored & cleaned)
 import os
+import csv
+import hashlib
 import calendar 
+from itertools import groupby
 from datetime import datetime, timezone 
 
 from flask import (
-    Flask, render_template, request, redirect, url_for, flash, send_file, make_response
+    Flask, render_template, request, redirect, url_for, flash, send_file, make_response,
+    Response, stream_with_context, session
 )
 from flask_login import (
     LoginManager, login_user, login_required, logout_user, current_user
 )
 from flask_migrate import Migrate
 from flask_wtf import CSRFProtect
-from sqlalchemy import extract, func, case
+from sqlalchemy import select, delete, func, case, and_
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import selectinload, joinedload, raiseload, load_only
 from sqlalchemy.exc import IntegrityError
 from calendar import month_name
 # Local imports (your modules)
-from extensions import db, login_manager  # assumes these initialize DB and login
-from models import User, TaxEntry, PerformanceTarget, PerformanceSummary
+from extensions import db, login_manager, cache  # assumes these initialize DB and login
+from models import User, TaxEntry, PerformanceTarget, PerformanceSummary, MonthlySummary, dummy_password_check
 from forms import LoginForm, CreateUserForm, TaxEntryForm
-from payment_api import verify_remita_rrr, verify_paydirect_reference
+from payment_api import verify_payments
 
 # Third-party libs used by export routes
 import pandas as pd
-from io import BytesIO
+from openpyxl import Workbook
+from io import BytesIO, StringIO
 
 # App setup
 app = Flask(__name__)
@@ -37,31 +44,91 @@ csrf = CSRFProtect(app)
 db.init_app(app)
 login_manager.init_app(app)
 login_manager.login_view = 'login'
+cache.init_app(app)
 migrate = Migrate(app, db)
 
+# Optional per-endpoint timing/query monitoring (pip install flask-monitoringdashboard)
+if app.config.get('MONITORING_DASHBOARD'):
+    import flask_monitoringdashboard as monitoring_dashboard
+    monitoring_dashboard.config.link = 'monitoring'  # '/dashboard' is taken by the app
+    monitoring_dashboard.bind(app)
+
+# 'YYYY-MM' expression for the configured backend, resolved once at startup
+MONTH_EXPR_FACTORY = {
+    'sqlite': lambda col: func.strftime('%Y-%m', col),
+    'postgresql': lambda col: func.to_char(col, 'YYYY-MM'),
+}.get(
+    make_url(app.config['SQLALCHEMY_DATABASE_URI']).get_backend_name(),
+    lambda col: func.date_format(col, '%Y-%m')  # MySQL or others
+)
+
+# INSERT construct with upsert support for the configured backend, for the
+# MonthlySummary rollup
+DB_BACKEND = make_url(app.config['SQLALCHEMY_DATABASE_URI']).get_backend_name()
+UPSERT_ON_DUPLICATE_KEY = DB_BACKEND in ('mysql', 'mariadb')
+if DB_BACKEND == 'postgresql':
+    from sqlalchemy.dialects.postgresql import insert as UPSERT_INSERT
+elif UPSERT_ON_DUPLICATE_KEY:
+    from sqlalchemy.dialects.mysql import insert as UPSERT_INSERT
+elif DB_BACKEND == 'sqlite':
+    from sqlalchemy.dialects.sqlite import insert as UPSERT_INSERT
+else:
+    raise RuntimeError(f"Unsupported database backend for the monthly rollup: {DB_BACKEND}")
+
 # ========== DASHBOARD DATA HELPERS ==========
 
+def strict_load_options(*options):
+    """Loader options for hot queries; with STRICT_ORM on, any relationship
+    not eager-loaded here raises instead of silently issuing a lazy load."""
+    if app.config.get('STRICT_ORM'):
+        return options + (raiseload('*'),)
+    return options
+
+# An ATO's target as a correlated scalar subquery, so league aggregates can
+# group by the user alone instead of also grouping by the joined target
+ATO_TARGET_AMOUNT = (
+    select(PerformanceTarget.target_amount)
+    .where(PerformanceTarget.user_id == User.id)
+    .limit(1)
+    .scalar_subquery()
+)
+
+# Columns the dashboard record lists actually use; skips the JSON `data` blob
+DASHBOARD_ENTRY_COLUMNS = load_only(
+    TaxEntry.date_uploaded,
+    TaxEntry.rrr_amount,
+    TaxEntry.paydirect_amount,
+    TaxEntry.rrr_verified,
+    TaxEntry.paydirect_verified,
+    TaxEntry.tax_item,
+    TaxEntry.subhead
+)
+
+@cache.memoize()
 def get_league_table_data():
     """Generate ranking of ATOs by percentage of target achieved."""
-    league = []
-    all_atos = User.query.filter_by(role='ato').all()
-
-    for ato in all_atos:
-        # Get all verified entries
-        entries = TaxEntry.query.filter_by(uploaded_by=ato.id).all()
-        total_returns = sum(
-            (e.rrr_amount or 0) + (e.paydirect_amount or 0)
-            for e in entries
-            if e.rrr_verified or e.paydirect_verified
+    # Verified totals and target per ATO in a single grouped query
+    rows = (
+        db.session.query(
+            User.username.label('ato_name'),
+            func.sum(TaxEntry.verified_total).label('total'),
+            ATO_TARGET_AMOUNT.label('target')
         )
+        .outerjoin(TaxEntry, TaxEntry.uploaded_by == User.id)
+        .filter(User.role == 'ato')
+        .group_by(User.id, User.username)
+        .all()
+    )
 
-        # Get target
-        target = get_target_for_ato(ato)
+    league = []
+    for row in rows:
+        total_returns = row.total or 0
+        target = row.target or 0
         percent_met = round((total_returns / target * 100), 2) if target else 0
 
         league.append({
-            'ato_name': ato.username,
-            'target': target or 0,
+            'ato_name': row.ato_name,
+            'target': target,
             'total_returns': total_returns,
             'percent_met': percent_met
         })
@@ -73,20 +140,11 @@ def get_league_table_data():
 def get_analytics_data(from_date=None, to_date=None):
     """Compute monthly totals across verified entries, filtered by date range."""
 
-    engine_name = db.engine.url.get_backend_name()
-    if engine_name == 'sqlite':
-        month_expr = func.strftime('%Y-%m', TaxEntry.date_uploaded)
-    elif engine_name == 'postgresql':
-        month_expr = func.to_char(TaxEntry.date_uploaded, 'YYYY-MM')
-    else:  # MySQL or others
-        month_expr = func.date_format(TaxEntry.date_uploaded, '%Y-%m')
+    month_expr = MONTH_EXPR_FACTORY(TaxEntry.date_uploaded)
 
     query = db.session.query(
         month_expr.label('month'),
-        func.sum(
-            (case((TaxEntry.rrr_verified, TaxEntry.rrr_amount), else_=0)) +
-            (case((TaxEntry.paydirect_verified, TaxEntry.paydirect_amount), else_=0))
-        ).label('total')
+        func.sum(TaxEntry.verified_total).label('total')
     )
 
     if from_date and to_date:
@@ -98,7 +156,7 @@ def get_analytics_data(from_date=None, to_date=None):
     results = query.group_by('month').order_by('month').all()
 
     data = [{'month': m or 'N/A', 'total': float(t or 0)} for m, t in results]
-    print("DEBUG - Analytics data:", data)
+    app.logger.debug("Analytics data: %s", data)
     return data
 
 # -------------------------
@@ -124,7 +182,10 @@ def login():
     form = LoginForm()
     if form.validate_on_submit():
         user = User.query.filter_by(username=form.username.data).first()
-        if user and user.check_password(form.password.data):
+        if user is None:
+            dummy_password_check(form.password.data)
+        elif user.check_password(form.password.data):
+            db.session.commit()  # keeps a hash upgraded by check_password
             login_user(user)
             flash('Login successful.', 'success')
 
@@ -143,43 +204,67 @@ def index():
     if current_user.is_authenticated:
         return redirect(url_for('dashboard'))
 
+    return render_template('index.html', **get_landing_stats())
+
+
+@cache.memoize(timeout=30)
+def get_landing_stats():
+    """Public landing-page counters. The counts are cached rather than the
+    rendered page, so flashed messages are never served from cache."""
     total_atos = User.query.filter_by(role='ato').count()
     total_entries = TaxEntry.query.count()
     verified_count = TaxEntry.query.filter(
         (TaxEntry.rrr_verified == True) | (TaxEntry.paydirect_verified == True)
     ).count()
 
-    return render_template('index.html',
-                           total_atos=total_atos,
-                           total_entries=total_entries,
-                           verified_count=verified_count)
+    return {
+        'total_atos': total_atos,
+        'total_entries': total_entries,
+        'verified_count': verified_count
+    }
 
 
 
+@cache.memoize()
 def get_analytics_data_filtered(from_date=None, to_date=None):
     """Return analytics data per month with totals for RRR, PayDirect, Total"""
-    query = db.session.query(
-        extract('month', TaxEntry.date_uploaded).label('month'),
-        func.sum(case((TaxEntry.rrr_verified, TaxEntry.rrr_amount), else_=0)).label('rrr'),
-        func.sum(case((TaxEntry.paydirect_verified, TaxEntry.paydirect_amount), else_=0)).label('paydirect')
-    )
-
-    if from_date:
-        from_date_obj = datetime.strptime(from_date, "%Y-%m-%d")
-        query = query.filter(TaxEntry.date_uploaded >= from_date_obj)
-    if to_date:
-        to_date_obj = datetime.strptime(to_date, "%Y-%m-%d")
-        query = query.filter(TaxEntry.date_uploaded <= to_date_obj)
-
-    query = query.group_by(extract('month', TaxEntry.date_uploaded)).order_by('month')
-    results = query.all()
+    if not from_date and not to_date:
+        # Unfiltered: the monthly rollup already holds these totals
+        results = (
+            db.session.query(
+                MonthlySummary.month.label('month'),
+                func.sum(MonthlySummary.rrr_total).label('rrr'),
+                func.sum(MonthlySummary.paydirect_total).label('paydirect')
+            )
+            .group_by(MonthlySummary.month)
+            .order_by('month')
+            .all()
+        )
+    else:
+        # Day-precision ranges don't align with month buckets; scan entries.
+        # Entries left without an uploader (deleted users) have no bucket, so
+        # skip them here too to keep both paths in agreement.
+        query = db.session.query(
+            TaxEntry.month.label('month'),
+            func.sum(case((TaxEntry.rrr_verified, TaxEntry.rrr_amount), else_=0)).label('rrr'),
+            func.sum(case((TaxEntry.paydirect_verified, TaxEntry.paydirect_amount), else_=0)).label('paydirect')
+        ).filter(TaxEntry.uploaded_by.isnot(None))
+
+        if from_date:
+            from_date_obj = datetime.strptime(from_date, "%Y-%m-%d")
+            query = query.filter(TaxEntry.date_uploaded >= from_date_obj)
+        if to_date:
+            to_date_obj = datetime.strptime(to_date, "%Y-%m-%d")
+            query = query.filter(TaxEntry.date_uploaded <= to_date_obj)
+
+        query = query.group_by(TaxEntry.month).order_by('month')
+        results = query.all()
 
     # Create full month list
     analytics = []
-    months_seen = {int(r.month) for r in results}
+    by_month = {int(r.month): (float(r.rrr or 0), float(r.paydirect or 0)) for r in results}
     for m in range(1, 13):
-        rrr = next((float(r.rrr) for r in results if int(r.month) == m), 0)
-        paydirect = next((float(r.paydirect) for r in results if int(r.month) == m), 0)
+        rrr, paydirect = by_month.get(m, (0.0, 0.0))
         total = rrr + paydirect
         analytics.append({
             'month': m,
@@ -195,12 +280,9 @@ def get_user_summary(user_id):
     """Compute the performance summary for an ATO from TaxEntry data."""
     # Sum verified RRR and Paydirect amounts
     result = db.session.query(
-        func.sum(TaxEntry.rrr_amount).label('rrr_total'),
-        func.sum(TaxEntry.paydirect_amount).label('paydirect_total')
-    ).filter(
-        TaxEntry.uploaded_by == user_id,
-        (TaxEntry.rrr_verified == True) | (TaxEntry.paydirect_verified == True)
-    ).first()
+        func.sum(case((TaxEntry.rrr_verified, TaxEntry.rrr_amount), else_=0)).label('rrr_total'),
+        func.sum(case((TaxEntry.paydirect_verified, TaxEntry.paydirect_amount), else_=0)).label('paydirect_total')
+    ).filter(TaxEntry.uploaded_by == user_id).first()
 
     rrr_total = result.rrr_total or 0
     paydirect_total = result.paydirect_total or 0
@@ -212,9 +294,183 @@ def get_user_summary(user_id):
         "total_amount": total
     }
 
-def get_target_for_ato(user):
-    target = PerformanceTarget.query.filter_by(user_id=user.id).first()
-    return target.target_amount if target else 0
+def get_ato_verified_totals():
+    """(username, verified total) for every ATO with entries, highest first."""
+    total = func.sum(MonthlySummary.rrr_total + MonthlySummary.paydirect_total)
+    stmt = (
+        select(User.username, total.label('total'))
+        .join(MonthlySummary, MonthlySummary.user_id == User.id)
+        .where(User.role == 'ato')
+        .group_by(User.id, User.username)
+        .order_by(total.desc())
+    )
+    return db.session.execute(stmt).all()
+
+@cache.memoize()
+def _compute_league(from_date=None, to_date=None, month=None, year=None):
+    """League table rows (RRR, Paydirect, Target, Actual, Percent) for the
+    admin dashboard, sorted by percent of target achieved."""
+    league_query = (
+        db.session.query(
+            User.id.label('user_id'),
+            User.username.label('ATO'),
+            func.sum(case((TaxEntry.rrr_verified, TaxEntry.rrr_amount), else_=0)).label('RRR'),
+            func.sum(case((TaxEntry.paydirect_verified, TaxEntry.paydirect_amount), else_=0)).label('Paydirect'),
+            ATO_TARGET_AMOUNT.label('Target')
+        )
+        .join(TaxEntry, User.id == TaxEntry.uploaded_by)
+        .filter(User.role == 'ato')
+    )
+    # Apply date range filters
+    if from_date:
+        league_query = league_query.filter(TaxEntry.date_uploaded >= from_date)
+
+    if to_date:
+        league_query = league_query.filter(TaxEntry.date_uploaded <= to_date)
+
+    # Apply month filter
+    if month:
+        league_query = league_query.filter(TaxEntry.month == month)
+
+    # Apply year filter
+    if year:
+        league_query = league_query.filter(TaxEntry.year == year)
+
+    # Rank by percent of target in SQL; ATOs without a target count as 0%
+    percent_expr = func.coalesce(
+        func.sum(TaxEntry.verified_total) / func.nullif(ATO_TARGET_AMOUNT, 0) * 100,
+        0
+    )
+
+    league_table = (
+    league_query
+    .group_by(User.id, User.username)
+    .order_by(percent_expr.desc())
+    .all()
+    )
+
+    enriched_league = []
+    for entry in league_table:
+        total = (entry.RRR or 0) + (entry.Paydirect or 0)
+        target = entry.Target or 0
+        percent = round((total / target * 100), 1) if target else 0
+
+        entry_dict = dict(entry._mapping)
+        entry_dict['Percent'] = percent
+        entry_dict['Actual'] = total
+
+        enriched_league.append(entry_dict)
+
+    return enriched_league
+
+
+def verified_amounts(entry):
+    """(RRR, PayDirect) amounts an entry contributes to verified totals."""
+    return (
+        (entry.rrr_amount or 0) if entry.rrr_verified else 0,
+        (entry.paydirect_amount or 0) if entry.paydirect_verified else 0
+    )
+
+
+def apply_monthly_summary_delta(user_id, year, month, entries=0, rrr=0, paydirect=0):
+    """Add a TaxEntry write's deltas to its (uploader, year, month) bucket of
+    the MonthlySummary rollup. One INSERT ... ON CONFLICT statement, so
+    concurrent writers to the same bucket add up instead of overwriting each
+    other or racing to create it. Call before commit."""
+    if not (user_id and year and month):
+        return
+
+    table = MonthlySummary.__table__
+    stmt = UPSERT_INSERT(table).values(
+        user_id=user_id, year=year, month=month,
+        entry_count=entries, rrr_total=rrr, paydirect_total=paydirect,
+        updated_at=datetime.utcnow()
+    )
+    if UPSERT_ON_DUPLICATE_KEY:
+        incoming = stmt.inserted
+        stmt = stmt.on_duplicate_key_update(
+            entry_count=table.c.entry_count + incoming.entry_count,
+            rrr_total=table.c.rrr_total + incoming.rrr_total,
+            paydirect_total=table.c.paydirect_total + incoming.paydirect_total,
+            updated_at=incoming.updated_at
+        )
+    else:
+        incoming = stmt.excluded
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.year, table.c.month],
+            set_={
+                'entry_count': table.c.entry_count + incoming.entry_count,
+                'rrr_total': table.c.rrr_total + incoming.rrr_total,
+                'paydirect_total': table.c.paydirect_total + incoming.paydirect_total,
+                'updated_at': incoming.updated_at
+            }
+        )
+    db.session.execute(stmt)
+
+    if entries < 0:
+        # last entry of the month was deleted; drop the bucket so the ATO
+        # doesn't linger in the league with a zero total
+        db.session.execute(
+            delete(MonthlySummary).where(
+                MonthlySummary.user_id == user_id,
+                MonthlySummary.year == year,
+                MonthlySummary.month == month,
+                MonthlySummary.entry_count <= 0
+            )
+        )
+
+
+def invalidate_dashboard_cache():
+    """Drop cached league/analytics aggregates after entry, target or role
+    changes. With the default SimpleCache this only clears the current
+    process; other workers keep their copy for up to CACHE_DEFAULT_TIMEOUT
+    unless CACHE_TYPE is a shared backend (e.g. RedisCache)."""
+    cache.delete_memoized(_compute_league)
+    cache.delete_memoized(get_league_table_data)
+    cache.delete_memoized(get_analytics_data_filtered)
+    cache.delete_memoized(get_league_table_rows)
+
+
+def analytics_etag(*content):
+    """ETag for the read-mostly analytics pages, or None when the page must
+    be rendered anyway (pending flash messages).
+
+    `content` is what the page renders from: its rows, or change signals
+    that move whenever those rows do. Hashing that rather than a global
+    fingerprint keeps the tag in step with the body, even when this
+    worker's memoized rows lag another worker's write."""
+    if session.get('_flashes'):
+        return None
+
+    key = repr((current_user.id, current_user.username, current_user.role, request.full_path, content))
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+def monthly_summary_fingerprint(user_id):
+    """Change signal for one uploader's entries. Every entry write upserts
+    its MonthlySummary bucket, so this moves on any submit, delete or
+    reverify without touching tax_entry."""
+    return tuple(db.session.query(
+        func.count(),
+        func.sum(MonthlySummary.entry_count),
+        func.sum(MonthlySummary.rrr_total),
+        func.sum(MonthlySummary.paydirect_total),
+        func.max(MonthlySummary.updated_at)
+    ).filter(MonthlySummary.user_id == user_id).one())
+
+
+def not_modified(etag):
+    """True when the client's cached copy (If-None-Match) is still current."""
+    return etag is not None and request.if_none_match.contains(etag)
+
+
+def with_etag(response, etag):
+    # private: pages are per-user; no-cache: browsers may keep them but must
+    # revalidate, which is what makes the 304 path reachable
+    if etag is not None:
+        response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache, must-revalidate, max-age=0'
+    return response
 
 
 @app.route('/dashboard')
@@ -222,26 +478,30 @@ def get_target_for_ato(user):
 def dashboard():
     if current_user.role == 'ato':
         
-        # existing ATO block (leave as is)
-        entries = TaxEntry.query.filter_by(uploaded_by=current_user.id).order_by(TaxEntry.date_uploaded.desc()).all()
-
-        total_returns = sum(
-            (e.rrr_amount or 0) + (e.paydirect_amount or 0)
-            for e in entries
-            if e.rrr_verified or e.paydirect_verified
+        # Only the most recent entries are rendered; totals come from SQL
+        entries = (
+            TaxEntry.query.options(*strict_load_options(DASHBOARD_ENTRY_COLUMNS))
+            .filter_by(uploaded_by=current_user.id)
+            .order_by(TaxEntry.date_uploaded.desc())
+            .limit(50)
+            .all()
         )
+
+        total_returns = db.session.query(
+            func.sum(TaxEntry.verified_total)
+        ).filter(TaxEntry.uploaded_by == current_user.id).scalar() or 0
         target = get_target_for_ato(current_user)
         target_amount = target if target else 0
         percent_met = round((total_returns / target_amount * 100), 2) if target_amount else 0
 
         monthly_data = (
             db.session.query(
-                extract('month', TaxEntry.date_uploaded).label('month'),
+                TaxEntry.month.label('month'),
                 func.sum(case((TaxEntry.rrr_verified, TaxEntry.rrr_amount), else_=0)).label('rrr_total'),
                 func.sum(case((TaxEntry.paydirect_verified, TaxEntry.paydirect_amount), else_=0)).label('paydirect_total'),
             )
             .filter(TaxEntry.uploaded_by == current_user.id)
-            .group_by(extract('month', TaxEntry.date_uploaded))
+            .group_by(TaxEntry.month)
             .order_by('month')
             .all()
         )
@@ -276,7 +536,9 @@ def dashboard():
 
     year = request.args.get('year', type=int)
 
-    query = TaxEntry.query
+    # Same scope as the MonthlySummary charts below: entries of deleted users
+    # (no uploader) are not counted
+    query = TaxEntry.query.filter(TaxEntry.uploaded_by.isnot(None))
 
     # Convert date strings → Python dates
     if from_date:
@@ -289,23 +551,23 @@ def dashboard():
 
     # Filter by month
     if month:
-        query = query.filter(extract('month', TaxEntry.date_uploaded) == month)
+        query = query.filter(TaxEntry.month == month)
 
     # Filter by year
     if year:
-        query = query.filter(extract('year', TaxEntry.date_uploaded) == year)
+        query = query.filter(TaxEntry.year == year)
 
 
      #Prepare chart data
 
     chart_data = (
         query.with_entities(
-            TaxEntry.date_uploaded.label('date'),
+            TaxEntry.date_only.label('date'),
             func.sum(case((TaxEntry.rrr_verified, TaxEntry.rrr_amount), else_=0)).label('rrr_total'),
             func.sum(case((TaxEntry.paydirect_verified, TaxEntry.paydirect_amount), else_=0)).label('pay_total')
         )
-        .group_by(func.date(TaxEntry.date_uploaded))
-        .order_by(func.date(TaxEntry.date_uploaded))
+        .group_by(TaxEntry.date_only)
+        .order_by(TaxEntry.date_only)
         .all()
     )
 
@@ -315,62 +577,18 @@ def dashboard():
     total_values = [rrr_values[i] + pay_values[i] for i in range(len(rrr_values))]
 
 
-    # League table summary grouped by ATO
-    
-    league_query = (
-        db.session.query(
-            User.id.label('user_id'),
-            User.username.label('ATO'),
-            func.sum(case((TaxEntry.rrr_verified, TaxEntry.rrr_amount), else_=0)).label('RRR'),
-            func.sum(case((TaxEntry.paydirect_verified, TaxEntry.paydirect_amount), else_=0)).label('Paydirect'),
-            PerformanceTarget.target_amount.label('Target')
-        )
-        .join(TaxEntry, User.id == TaxEntry.uploaded_by)
-        .outerjoin(PerformanceTarget, PerformanceTarget.user_id == User.id)
-        .filter(User.role == 'ato')
-    )
-    # Apply date range filters
-    if from_date:
-        league_query = league_query.filter(TaxEntry.date_uploaded >= from_date)
+    # League table summary grouped by ATO (cached per filter combination)
+    enriched_league = _compute_league(from_date, to_date, month, year)
 
-    if to_date:
-        league_query = league_query.filter(TaxEntry.date_uploaded <= to_date)
-
-    # Apply month filter
-    if month:
-        league_query = league_query.filter(extract('month', TaxEntry.date_uploaded) == month)
 
-    # Apply year filter
-    if year:
-        league_query = league_query.filter(extract('year', TaxEntry.date_uploaded) == year)
-
-    league_table = (
-    league_query
-    .group_by(User.id, PerformanceTarget.target_amount)
-    .order_by(func.sum(TaxEntry.rrr_amount + TaxEntry.paydirect_amount).desc())
-    .all()
-    )
-
-    enriched_league = []
-    for entry in league_table:
-        total = (entry.RRR or 0) + (entry.Paydirect or 0)
-        target = entry.Target or 0
-        percent = round((total / target * 100), 1) if target else 0
-
-        entry_dict = dict(entry._mapping)
-        entry_dict['Percent'] = percent
-        entry_dict['Actual'] = total
-
-        enriched_league.append(entry_dict)
-
-    # Sort by Percent descending
-    enriched_league.sort(key=lambda x: x['Percent'], reverse=True)
-         
-
-    total_rrr = sum([float(r['RRR'] or 0) for r in enriched_league])
-    total_paydirect = sum([float(r['Paydirect'] or 0) for r in enriched_league])
+    # Single pass over the league for the summary cards
+    total_rrr = total_paydirect = percent_sum = 0.0
+    for r in enriched_league:
+        total_rrr += float(r['RRR'] or 0)
+        total_paydirect += float(r['Paydirect'] or 0)
+        percent_sum += r['Percent']
     total_all = total_rrr + total_paydirect
-    avg_percent = round(sum([r['Percent'] for r in enriched_league]) / len(enriched_league), 1) if enriched_league else 0
+    avg_percent = round(percent_sum / len(enriched_league), 1) if enriched_league else 0
 
     analytics = get_analytics_data_filtered(from_date, to_date)
     # --- Prepare summaries dictionary ---
@@ -391,9 +609,10 @@ def dashboard():
         'grand_total': total_all,
         'avg_percent': avg_percent
     }
-   # After you sort enriched_league by Percent descending:
+    # enriched_league arrives ordered by Percent descending from SQL, and the
+    # full list is rendered anyway, so top/bottom 5 are plain slices of it
     top_5 = enriched_league[:5]
-    bottom_5 = enriched_league[-5:] if len(enriched_league) >= 5 else enriched_league[-len(enriched_league):]
+    bottom_5 = enriched_league[-5:]
 
     summaries['top5_labels'] = [r['ATO'] for r in top_5]
     summaries['top5_values'] = [r['Percent'] for r in top_5]
@@ -402,14 +621,14 @@ def dashboard():
     summaries['bottom5_values'] = [r['Percent'] for r in bottom_5]
 
     # Aggregate monthly totals for summary charts (Admin/Chairman)
+    # (read from the MonthlySummary rollup instead of rescanning tax_entry)
     monthly_summary_data = (
         db.session.query(
-            extract('month', TaxEntry.date_uploaded).label('month'),
-            func.sum(case((TaxEntry.rrr_verified, TaxEntry.rrr_amount), else_=0)).label('rrr_total'),
-            func.sum(case((TaxEntry.paydirect_verified, TaxEntry.paydirect_amount), else_=0)).label('paydirect_total')
+            MonthlySummary.month.label('month'),
+            func.sum(MonthlySummary.rrr_total).label('rrr_total'),
+            func.sum(MonthlySummary.paydirect_total).label('paydirect_total')
         )
-        .filter(TaxEntry.date_uploaded != None)  # optional: adjust filters if needed
-        .group_by(extract('month', TaxEntry.date_uploaded))
+        .group_by(MonthlySummary.month)
         .order_by('month')
         .all()
     )
@@ -442,23 +661,36 @@ def download_submissions():
     if start_date and end_date:
         query = query.filter(TaxEntry.date_uploaded.between(start_date, end_date))
 
-    entries = query.all()
-
-    # Convert to Excel
-    data = [{
-        'RRR': e.rrr,
-        'Tax Item': e.tax_item,
-        'Subhead': e.subhead,
-        'Amount': e.rrr_amount or e.paydirect_amount,
-        'Date Uploaded': e.date_uploaded,
-        'Month': e.month,
-        'Year': e.year,
-        'Uploaded By': e.uploaded_by
-    } for e in entries]
-
-    df = pd.DataFrame(data)
+    rows = query.with_entities(
+        TaxEntry.rrr,
+        TaxEntry.tax_item,
+        TaxEntry.subhead,
+        TaxEntry.rrr_amount,
+        TaxEntry.paydirect_amount,
+        TaxEntry.date_uploaded,
+        TaxEntry.month,
+        TaxEntry.year,
+        TaxEntry.uploaded_by
+    ).yield_per(1000)
+
+    # Stream rows into a write-only workbook so memory stays bounded
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Sheet1')
+    ws.append(['RRR', 'Tax Item', 'Subhead', 'Amount', 'Date Uploaded', 'Month', 'Year', 'Uploaded By'])
+    for r in rows:
+        ws.append([
+            r.rrr,
+            r.tax_item,
+            r.subhead,
+            r.rrr_amount or r.paydirect_amount,
+            r.date_uploaded,
+            r.month,
+            r.year,
+            r.uploaded_by
+        ])
+
     output = BytesIO()
-    df.to_excel(output, index=False)
+    wb.save(output)
     output.seek(0)
     return send_file(output, download_name="submissions.xlsx", as_attachment=True)
 
@@ -473,7 +705,12 @@ def dashboards():
 
     if user.role == 'ato':
         # ATO: calculate their totals and recent entries
-        entries = TaxEntry.query.filter_by(uploaded_by=user.id).order_by(TaxEntry.date_uploaded.desc()).all()
+        entries = (
+            TaxEntry.query.options(DASHBOARD_ENTRY_COLUMNS)
+            .filter_by(uploaded_by=user.id)
+            .order_by(TaxEntry.date_uploaded.desc())
+            .all()
+        )
         rrr_total = sum(e.rrr_amount or 0 for e in entries if e.rrr_verified)
         paydirect_total = sum(e.paydirect_amount or 0 for e in entries if e.paydirect_verified)
         combined_total = rrr_total + paydirect_total
@@ -495,7 +732,7 @@ def dashboards():
 
         # Chart: monthly totals
         monthly_totals = (
-            db.session.query(extract('month', TaxEntry.date_uploaded).label('month'),
+            db.session.query(TaxEntry.month.label('month'),
                              func.sum(TaxEntry.rrr_amount + TaxEntry.paydirect_amount))
             .filter_by(uploaded_by=user.id)
             .group_by('month')
@@ -507,49 +744,81 @@ def dashboards():
             chart_data[int(month)-1] = float(total)
 
     elif user.role in ['admin', 'chairman', 'director']:
-        # Admin/Chairman: summary for all ATOs
-        atos = User.query.filter_by(role='ato').all()
-        summaries = []
-        chart_data = [0]*12
+        # Admin/Chairman: summary for all ATOs, aggregated per ATO in SQL
+        ato_totals = (
+            db.session.query(
+                User.id.label('user_id'),
+                User.username.label('username'),
+                func.sum(case((TaxEntry.rrr_verified, TaxEntry.rrr_amount), else_=0)).label('rrr_total'),
+                func.sum(case((TaxEntry.paydirect_verified, TaxEntry.paydirect_amount), else_=0)).label('paydirect_total'),
+                ATO_TARGET_AMOUNT.label('target')
+            )
+            .outerjoin(TaxEntry, TaxEntry.uploaded_by == User.id)
+            .filter(User.role == 'ato')
+            .group_by(User.id, User.username)
+            .order_by(User.id)
+            .all()
+        )
 
-        for ato in atos:
-            entries = TaxEntry.query.filter_by(uploaded_by=ato.id).all()
-            rrr_total = sum(e.rrr_amount or 0 for e in entries if e.rrr_verified)
-            paydirect_total = sum(e.paydirect_amount or 0 for e in entries if e.paydirect_verified)
+        # recent entries (last 5 per ATO) via a window function
+        ranked = (
+            db.session.query(
+                TaxEntry.uploaded_by,
+                TaxEntry.date_uploaded,
+                TaxEntry.rrr_amount,
+                TaxEntry.paydirect_amount,
+                func.row_number().over(
+                    partition_by=TaxEntry.uploaded_by,
+                    order_by=TaxEntry.date_uploaded.desc()
+                ).label('rn')
+            )
+            .subquery()
+        )
+        recent_rows = (
+            db.session.query(ranked)
+            .filter(ranked.c.rn <= 5)
+            .order_by(ranked.c.uploaded_by, ranked.c.rn)
+            .all()
+        )
+        recent_by_ato = {}
+        for r in recent_rows:
+            recent_by_ato.setdefault(r.uploaded_by, []).append({
+                'date': r.date_uploaded.strftime('%Y-%m-%d'),
+                'rrr_amount': r.rrr_amount,
+                'paydirect_amount': r.paydirect_amount,
+                'total': (r.rrr_amount or 0) + (r.paydirect_amount or 0)
+            })
+
+        summaries = []
+        for row in ato_totals:
+            rrr_total = row.rrr_total or 0
+            paydirect_total = row.paydirect_total or 0
             combined_total = rrr_total + paydirect_total
-            target = get_target_for_ato(ato) or 0
+            target = row.target or 0
             percent = round((combined_total / target * 100), 2) if target else 0
 
-            # recent entries (last 5)
-            recent_records = [
-                {
-                    'date': e.date_uploaded.strftime('%Y-%m-%d'),
-                    'rrr_amount': e.rrr_amount,
-                    'paydirect_amount': e.paydirect_amount,
-                    'total': (e.rrr_amount or 0) + (e.paydirect_amount or 0)
-                } for e in sorted(entries, key=lambda x: x.date_uploaded, reverse=True)[:5]
-            ]
-
             summaries.append({
-                'username': ato.username,
+                'username': row.username,
                 'rrr_total': rrr_total,
                 'paydirect_total': paydirect_total,
                 'total_amount': combined_total,
                 'target': target,
                 'percent': percent,
-                'records': recent_records
+                'records': recent_by_ato.get(row.user_id, [])
             })
 
-            # accumulate chart data
-            monthly_totals = (
-                db.session.query(extract('month', TaxEntry.date_uploaded).label('month'),
-                                 func.sum(TaxEntry.rrr_amount + TaxEntry.paydirect_amount))
-                .filter_by(uploaded_by=ato.id)
-                .group_by('month')
-                .all()
-            )
-            for month, total in monthly_totals:
-                chart_data[int(month)-1] += float(total)
+        # Chart: monthly totals across all ATOs
+        monthly_totals = (
+            db.session.query(TaxEntry.month.label('month'),
+                             func.sum(TaxEntry.rrr_amount + TaxEntry.paydirect_amount))
+            .join(User, User.id == TaxEntry.uploaded_by)
+            .filter(User.role == 'ato')
+            .group_by('month')
+            .all()
+        )
+        chart_data = [0]*12
+        for month, total in monthly_totals:
+            chart_data[int(month)-1] += float(total or 0)
 
     return render_template('dashboard.html',
                            summaries=summaries,
@@ -611,9 +880,11 @@ def view_entries():
     tax_item = request.args.get('tax_item')
     date_filter = request.args.get('date')
 
-    # Role-aware base query
+    # Role-aware base query. The template shows entry.user.username: admins
+    # see many uploaders, so load them for the page in one IN query; an
+    # ATO's own entries resolve entry.user from the already-loaded current_user.
     if current_user.role in ['admin', 'reviewer']:
-        query = TaxEntry.query
+        query = TaxEntry.query.options(*strict_load_options(selectinload(TaxEntry.user)))
     else:
         query = TaxEntry.query.filter_by(uploaded_by=current_user.id)
 
@@ -623,13 +894,12 @@ def view_entries():
     if date_filter:
         try:
             date_obj = datetime.strptime(date_filter, '%Y-%m-%d')
-            query = query.filter(func.date(TaxEntry.date_uploaded) == date_obj.date())
+            query = query.filter(TaxEntry.date_only == date_obj.date())
         except ValueError:
             flash("Invalid date format. Use YYYY-MM-DD.", "warning")
 
     pagination = query.order_by(TaxEntry.date_uploaded.desc()).paginate(page=page, per_page=per_page)
     entries = pagination.items
-    total_count = query.count()
 
     # Tax item breakdown (role-aware)
     if current_user.role in ['admin', 'reviewer']:
@@ -651,7 +921,7 @@ def view_entries():
         pagination=pagination,
         tax_item=tax_item,
         date_filter=date_filter,
-        total_count=total_count,
+        total_count=pagination.total,
         tax_item_breakdown=tax_item_breakdown
     )
 
@@ -667,6 +937,7 @@ def edit_user(user_id):
     if new_role in ['admin', 'reviewer', 'ato']:
         user.role = new_role
         db.session.commit()
+        invalidate_dashboard_cache()
         flash(f"Role updated for {user.username}.", "success")
     else:
         flash("Invalid role selected.", "warning")
@@ -686,14 +957,16 @@ def delete_user(user_id):
         return redirect(url_for("manage_users"))
 
     try:
+        MonthlySummary.query.filter_by(user_id=user.id).delete()
         db.session.delete(user)
         db.session.commit()
+        invalidate_dashboard_cache()
         flash(f"User {user.username} deleted successfully.", "info")
-        print(f"Deleted user: {user.username}")
+        app.logger.info("Deleted user: %s", user.username)
     except Exception as e:
         db.session.rollback()
         flash(f"Error deleting user: {str(e)}", "danger")
-        print(f"Deletion error: {e}")
+        app.logger.error("Deletion error: %s", e)
 
     return redirect(url_for("manage_users"))
 
@@ -711,27 +984,13 @@ def submit_tax_item():
     tax_item = request.form.get('tax_item')
     road_subhead = request.form.get('road_subhead') if tax_item == 'Road' else None
 
-    remita_rrr = request.form.get('remita_rrr')
-    paydirect_ref = request.form.get('paydirect')
-
-     # 🔒 Check for duplicate RRR
-    if remita_rrr:
-        existing_rrr = TaxEntry.query.filter_by(rrr=remita_rrr).first()
-        if existing_rrr:
-            flash("❌ This Remita RRR has already been used. Please enter a unique one.", "danger")
-            return redirect(url_for('enter_tax_data'))
-
-    # 🔒 Check for duplicate PayDirect
-    if paydirect_ref:
-        existing_paydirect = TaxEntry.query.filter_by(paydirect_ref=paydirect_ref).first()
-        if existing_paydirect:
-            flash("❌ This PayDirect reference has already been used. Please enter a unique one.", "danger")
-            return redirect(url_for('enter_tax_data'))
-
+    # Blank fields become NULL so the partial unique indexes ignore them;
+    # duplicates are rejected by the database on insert (see IntegrityError below)
+    remita_rrr = request.form.get('remita_rrr') or None
+    paydirect_ref = request.form.get('paydirect') or None
 
     # call verification APIs (these functions should return dicts with 'verified' and 'amount')
-    rrr_result = verify_remita_rrr(remita_rrr) if remita_rrr else {"verified": False, "amount": 0}
-    paydirect_result = verify_paydirect_reference(paydirect_ref) if paydirect_ref else {"verified": False, "amount": 0}
+    rrr_result, paydirect_result = verify_payments(remita_rrr, paydirect_ref)
 
     date_of_collection = datetime.utcnow().strftime('%Y-%m-%d')
 
@@ -745,10 +1004,6 @@ def submit_tax_item():
     data = {key: value for key, value in request.form.items() if key not in ['tax_item', 'road_subhead', 'remita_rrr', 'paydirect']}
     data['date_of_collection'] = date_of_collection
 
-    now = datetime.utcnow()
-    month = now.month
-    year = now.year
-
     new_entry = TaxEntry(
         tax_item=tax_item,
         subhead=road_subhead,
@@ -759,19 +1014,28 @@ def submit_tax_item():
         paydirect_ref=paydirect_ref,
         paydirect_verified=paydirect_verified,
         paydirect_amount=paydirect_amount,
-        data=data,
-        date_uploaded=datetime.utcnow(),
-        month=month,  
-        year=year     
+        data=data
     )
 
     try:
         db.session.add(new_entry)
+        db.session.flush()
+        apply_monthly_summary_delta(new_entry.uploaded_by, new_entry.year, new_entry.month,
+                                    1, *verified_amounts(new_entry))
         db.session.commit()
+        invalidate_dashboard_cache()
         flash(f"{tax_item} entry submitted successfully.", "success")
-    except IntegrityError:
+    except IntegrityError as e:
         db.session.rollback()
-        flash("❌ Duplicate RRR or PayDirect reference detected. Entry not saved.", "danger")
+        # Constraint/column name identifies which reference was reused
+        # (sqlite reports the column, PostgreSQL/MySQL the index name)
+        detail = str(e.orig)
+        if 'paydirect_ref' in detail:
+            flash("❌ This PayDirect reference has already been used. Please enter a unique one.", "danger")
+        elif 'tax_entry.rrr' in detail or 'uq_tax_entry_rrr' in detail:
+            flash("❌ This Remita RRR has already been used. Please enter a unique one.", "danger")
+        else:
+            flash(f"Error saving entry: {str(e.orig)}", "danger")
     except Exception as e:
         db.session.rollback()
         flash(f"Error saving entry: {str(e)}", "danger")
@@ -785,8 +1049,13 @@ def delete_entry(entry_id):
     entry = TaxEntry.query.get_or_404(entry_id)
     if not entry.rrr_verified and not entry.paydirect_verified:
         try:
+            rrr, paydirect = verified_amounts(entry)
             db.session.delete(entry)
+            db.session.flush()
+            apply_monthly_summary_delta(entry.uploaded_by, entry.year, entry.month,
+                                        -1, -rrr, -paydirect)
             db.session.commit()
+            invalidate_dashboard_cache()
             flash("Entry deleted successfully.", "success")
         except Exception as e:
             db.session.rollback()
@@ -802,7 +1071,7 @@ def delete_entry(entry_id):
 @app.route('/performance_tracker')
 @login_required
 def performance_tracker():
-    target = PerformanceTarget.query.filter_by(user_id=current_user.id).first()
+    target = current_user.target
     # use SQL sum with coalesce to avoid None
     actual_sum = db.session.query(func.coalesce(func.sum(
         (func.coalesce(TaxEntry.rrr_amount, 0) + func.coalesce(TaxEntry.paydirect_amount, 0))
@@ -822,46 +1091,58 @@ def analytics_dashboard():
     tax_item = request.args.get('tax_item')
     subhead = request.args.get('subhead')
 
-    # build chart query with SQL coalesce (NULL-safe)
+    etag = analytics_etag(monthly_summary_fingerprint(current_user.id), get_target_for_ato(current_user))
+    if not_modified(etag):
+        return with_etag(make_response('', 304), etag)
+
+    # verified totals per (year, month) straight from the monthly rollup;
+    # grouping on year too keeps e.g. Jan 2025 and Jan 2026 apart
     chart_query = db.session.query(
-        extract('month', TaxEntry.date_uploaded).label('month'),
-        func.sum(func.coalesce(TaxEntry.rrr_amount, 0) + func.coalesce(TaxEntry.paydirect_amount, 0)).label('total')
-    ).filter_by(uploaded_by=current_user.id)
+        MonthlySummary.year,
+        MonthlySummary.month,
+        (MonthlySummary.rrr_total + MonthlySummary.paydirect_total).label('total')
+    ).filter(MonthlySummary.user_id == current_user.id)
 
     if month:
-        chart_query = chart_query.filter(extract('month', TaxEntry.date_uploaded) == month)
+        chart_query = chart_query.filter(MonthlySummary.month == month)
 
-    monthly_data = chart_query.group_by('month').all()
+    monthly_data = chart_query.order_by(MonthlySummary.year, MonthlySummary.month).all()
 
-    # ensure JSON-friendly chart_data for Chart.js; fill months 1..12 for consistent display
+    # ensure JSON-friendly chart_data for Chart.js; fill months 1..12 of each year for consistent display
     chart_data = []
-    mon_map = {int(m): float(t) for m, t in monthly_data}
-    for m in range(1, 13):
-        chart_data.append({'month': m, 'total': mon_map.get(m, 0.0)})
+    mon_map = {(y, m): float(t or 0) for y, m, t in monthly_data}
+    years = sorted({y for y, _ in mon_map}) or [datetime.now(timezone.utc).year]
+    for y in years:
+        for m in range(1, 13):
+            chart_data.append({'year': y, 'month': m, 'total': mon_map.get((y, m), 0.0)})
 
     # submissions list
-    entry_query = TaxEntry.query.filter_by(uploaded_by=current_user.id)
+    entry_filters = [TaxEntry.uploaded_by == current_user.id]
     if tax_item:
-        entry_query = entry_query.filter(TaxEntry.tax_item.ilike(f"%{tax_item}%"))
+        entry_filters.append(TaxEntry.tax_item.ilike(f"%{tax_item}%"))
     if subhead:
-        entry_query = entry_query.filter(TaxEntry.subhead.ilike(f"%{subhead}%"))
-    # avoid N+1 when rendering entry user info
-    entries = entry_query.order_by(TaxEntry.date_uploaded.desc()).all()
+        entry_filters.append(TaxEntry.subhead.ilike(f"%{subhead}%"))
+    # plain rows with just the columns the submissions table shows
+    entries = (
+        db.session.query(TaxEntry.tax_item, TaxEntry.subhead, TaxEntry.date_uploaded, TaxEntry.data)
+        .filter(*entry_filters)
+        .order_by(TaxEntry.date_uploaded.desc())
+        .all()
+    )
 
     # performance numbers
-    target = PerformanceTarget.query.filter_by(user_id=current_user.id).first()
-    actual = sum(
-        (e.rrr_amount or 0) + (e.paydirect_amount or 0)
-        for e in entries if e.rrr_verified or e.paydirect_verified
-    )
+    target = current_user.target
+    actual = db.session.query(
+        func.coalesce(func.sum(TaxEntry.verified_total), 0)
+    ).filter(*entry_filters).scalar()
 
-    return render_template(
+    return with_etag(make_response(render_template(
         'analytics_dashboard.html',
         chart_data=chart_data,
         entries=entries,
         target=target,
         actual=actual
-    )
+    )), etag)
 
 
 # -------------------------
@@ -875,24 +1156,12 @@ def analytics_admin():
         flash('Access denied.', 'danger')
         return redirect(url_for('dashboard'))
 
-    # aggregate verified totals by ATO username (use JOINs to be more efficient)
-    ato_totals = {}
-    # load all entries with uploader users to avoid N+1
-    entries = TaxEntry.query.all()
-    for entry in entries:
-        user = User.query.get(entry.uploaded_by)
-        if not user or user.role != 'ato':
-            continue
-        ato = user.username
-        if ato not in ato_totals:
-            ato_totals[ato] = 0
-        if entry.rrr_verified:
-            ato_totals[ato] += entry.rrr_amount or 0
-        if entry.paydirect_verified:
-            ato_totals[ato] += entry.paydirect_amount or 0
+    sorted_analytics = get_ato_verified_totals()
+    etag = analytics_etag(sorted_analytics)
+    if not_modified(etag):
+        return with_etag(make_response('', 304), etag)
 
-    sorted_analytics = sorted(ato_totals.items(), key=lambda x: x[1], reverse=True)
-    return render_template('analytics.html', analytics=sorted_analytics)
+    return with_etag(make_response(render_template('analytics.html', analytics=sorted_analytics)), etag)
 
 
 @app.route('/export_analytics')
@@ -902,26 +1171,22 @@ def export_analytics():
         flash('Access denied.', 'danger')
         return redirect(url_for('dashboard'))
 
-    entries = TaxEntry.query.all()
-    data = {}
-
-    for entry in entries:
-        user = User.query.get(entry.uploaded_by)
-        if not user or user.role != 'ato':
-            continue
-        ato = user.username
-        if ato not in data:
-            data[ato] = 0
-        if entry.rrr_verified:
-            data[ato] += entry.rrr_amount or 0
-        if entry.paydirect_verified:
-            data[ato] += entry.paydirect_amount or 0
-
-    df = pd.DataFrame(list(data.items()), columns=['ATO Name', 'Total Verified Amount'])
-    output = BytesIO()
-    df.to_csv(output, index=False)
-    output.seek(0)
-    return send_file(output, download_name='analytics_export.csv', as_attachment=True)
+    rows = get_ato_verified_totals()
+
+    def generate():
+        buffer = StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        for row in [('ATO Name', 'Total Verified Amount'), *rows]:
+            writer.writerow(row)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/csv',
+        headers={'Content-Disposition': 'attachment; filename=analytics_export.csv'}
+    )
 
 
 # -------------------------
@@ -932,41 +1197,59 @@ def export_analytics():
 
 def get_target_for_ato(user):
     """
-    Fetches the performance target for an ATO (User object).
+    Returns the performance target for an ATO (User object).
     Returns 0 if no target is found.
     """
     if not user:
         return 0
 
-    target_record = db.session.query(PerformanceTarget).filter_by(user_id=user.id).first()
-    return target_record.target_amount if target_record else 0
+    # User.target is joined-loaded with the user, so this costs no query
+    return user.target.target_amount if user.target else 0
+
+@cache.memoize()
+def get_league_table_rows(from_date=None, to_date=None, page=1, per_page=100):
+    """One page of /league-table rows, ranked by percent of target, plus the
+    total number of ranked ATOs. Cached per date range and page; dropped by
+    invalidate_dashboard_cache()."""
+    # Base query for performance ranking. Without a date range the monthly
+    # rollup has the same totals; a range needs the raw entries.
+    if from_date or to_date:
+        actual_expr = func.sum(TaxEntry.verified_total)
+        stmt = select(
+            User.id.label('user_id'),
+            User.username.label('ATO'),
+            func.sum(case((TaxEntry.rrr_verified, TaxEntry.rrr_amount), else_=0)).label('RRR'),
+            func.sum(case((TaxEntry.paydirect_verified, TaxEntry.paydirect_amount), else_=0)).label('Paydirect'),
+            ATO_TARGET_AMOUNT.label('Target')
+        ).join(TaxEntry, User.id == TaxEntry.uploaded_by)
+        if from_date:
+            stmt = stmt.where(TaxEntry.date_uploaded >= from_date)
+        if to_date:
+            stmt = stmt.where(TaxEntry.date_uploaded <= to_date)
+    else:
+        actual_expr = func.sum(MonthlySummary.rrr_total + MonthlySummary.paydirect_total)
+        stmt = select(
+            User.id.label('user_id'),
+            User.username.label('ATO'),
+            func.sum(MonthlySummary.rrr_total).label('RRR'),
+            func.sum(MonthlySummary.paydirect_total).label('Paydirect'),
+            ATO_TARGET_AMOUNT.label('Target')
+        ).join(MonthlySummary, User.id == MonthlySummary.user_id)
 
-@app.route('/league-table')
-@login_required
-def league_table():
-    from_date = request.args.get('from_date')
-    to_date = request.args.get('to_date')
-
-    # Base query for performance ranking
-    query = db.session.query(
-        User.id.label('user_id'),
-        User.username.label('ATO'),
-        func.sum(case((TaxEntry.rrr_verified, TaxEntry.rrr_amount), else_=0)).label('RRR'),
-        func.sum(case((TaxEntry.paydirect_verified, TaxEntry.paydirect_amount), else_=0)).label('Paydirect'),
-        PerformanceTarget.target_amount.label('Target')
-    ).join(TaxEntry, User.id == TaxEntry.uploaded_by
-    ).outerjoin(PerformanceTarget, PerformanceTarget.user_id == User.id
-    ).filter(User.role == 'ato')
-
-    # Apply date filters if provided
-    if from_date:
-        query = query.filter(TaxEntry.date_uploaded >= from_date)
-    if to_date:
-        query = query.filter(TaxEntry.date_uploaded <= to_date)
+    stmt = stmt.where(User.role == 'ato')
 
     # Group results
-    query = query.group_by(User.id, User.username, PerformanceTarget.target_amount)
-    league = query.all()
+    stmt = stmt.group_by(User.id, User.username)
+    ato_count = db.session.execute(select(func.count()).select_from(stmt.subquery())).scalar()
+
+    # Rank by percent of target in SQL (no target counts as 0%) and fetch
+    # only the requested page
+    percent_expr = func.coalesce(actual_expr / func.nullif(ATO_TARGET_AMOUNT, 0) * 100, 0)
+    league = db.session.execute(
+        stmt.order_by(percent_expr.desc(), User.username)
+        .limit(per_page)
+        .offset((page - 1) * per_page)
+    ).all()
 
     # Enrich and compute performance %
     enriched_league = []
@@ -987,17 +1270,33 @@ def league_table():
             'Percent': percent
         })
 
-    # ✅ Always force numeric sort before render
-    enriched_league.sort(key=lambda x: float(x['Percent']), reverse=True)
+    return enriched_league, ato_count
+
+@app.route('/league-table')
+@login_required
+def league_table():
+    from_date = request.args.get('from_date')
+    to_date = request.args.get('to_date')
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = 100
+
+    # Only the rows are cached; the page itself carries per-user flashes
+    enriched_league, ato_count = get_league_table_rows(from_date, to_date, page, per_page)
 
-    # Prevent caching (so browser doesn’t reuse stale table)
-    response = make_response(render_template(
+    etag = analytics_etag(enriched_league, ato_count)
+    if not_modified(etag):
+        return with_etag(make_response('', 304), etag)
+
+    # Browsers must revalidate (ETag) rather than reuse a stale table
+    response = with_etag(make_response(render_template(
         'league_table.html',
         league=enriched_league,
         from_date=from_date,
-        to_date=to_date
-    ))
-    response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
+        to_date=to_date,
+        page=page,
+        pages=(ato_count + per_page - 1) // per_page,
+        rank_offset=(page - 1) * per_page
+    )), etag)
     response.headers['Pragma'] = 'no-cache'
 
     return response
@@ -1035,6 +1334,7 @@ def create_ato():
             )
             db.session.add(target)
             db.session.commit()
+            invalidate_dashboard_cache()
 
             flash(f"ATO '{username}' created with fixed target.", "success")
             return redirect(url_for('league_table'))
@@ -1050,40 +1350,45 @@ def create_ato():
 @login_required
 def compare_atos():
     month = request.args.get('month')
-    lga = request.args.get('lga')
 
-    users_query = User.query.filter_by(role='ato')
-    if lga:
-        users_query = users_query.filter_by(lga=lga)
-    users = users_query.all()
+    # Optional 'YYYY-MM' filter as a half-open date range (index-friendly)
+    summary_join = [PerformanceSummary.user_id == User.id]
+    if month:
+        try:
+            year, m = map(int, month.split('-'))
+            month_start = datetime(year, m, 1)
+            month_end = datetime(year + m // 12, m % 12 + 1, 1)
+            summary_join += [
+                PerformanceSummary.date_uploaded >= month_start,
+                PerformanceSummary.date_uploaded < month_end
+            ]
+        except Exception:
+            pass
+
+    # Every ATO's summaries in one ordered query (outer join keeps ATOs with
+    # none), bucketed per user below
+    rows = (
+        db.session.query(User.id, User.username, PerformanceSummary.date_uploaded, PerformanceSummary.total_amount)
+        .outerjoin(PerformanceSummary, and_(*summary_join))
+        .filter(User.role == 'ato')
+        .order_by(User.id, PerformanceSummary.date_uploaded.asc())
+        .all()
+    )
 
     chart_data = {}
     labels = []
 
-    for user in users:
-        summaries_q = PerformanceSummary.query.filter_by(uploaded_by=user.id).order_by(PerformanceSummary.date_uploaded.asc())
-        if month:
-            try:
-                year, m = map(int, month.split('-'))
-                summaries_q = summaries_q.filter(
-                    extract('year', PerformanceSummary.date_uploaded) == year,
-                    extract('month', PerformanceSummary.date_uploaded) == m
-                )
-            except Exception:
-                pass
-        summaries = summaries_q.all()
-        chart_data[user.username] = [s.total_amount for s in summaries]
+    for (_, username), group in groupby(rows, key=lambda r: (r.id, r.username)):
+        summaries = [r for r in group if r.date_uploaded is not None]
+        chart_data[username] = [r.total_amount for r in summaries]
         if not labels and summaries:
-            labels = [s.date_uploaded.strftime('%d %b') for s in summaries]
+            labels = [r.date_uploaded.strftime('%d %b') for r in summaries]
 
     rankings = sorted(chart_data.items(), key=lambda x: sum(x[1]), reverse=True)
-    all_lgas = db.session.query(User.lga).distinct().all()
-    lgas = [l[0] for l in all_lgas if l[0]]
     return render_template('compare_atos.html',
                            chart_data=chart_data,
                            chart_labels=labels,
-                           rankings=rankings,
-                           lgas=lgas)
+                           rankings=rankings)
 
 
 # -------------------------
@@ -1093,7 +1398,7 @@ def compare_atos():
 @app.route("/ato/<int:user_id>")
 @login_required
 def ato_detail(user_id):
-    user = db.session.get(User, user_id)
+    user = db.session.get(User, user_id, options=strict_load_options(joinedload(User.target)))
     if not user or user.role != "ato":
         flash("ATO not found or invalid access.", "warning")
         return redirect(url_for("league_table"))
@@ -1119,33 +1424,39 @@ def ato_detail(user_id):
         except ValueError:
             flash("Invalid date range format. Showing all records.", "warning")
 
-    # Retrieve filtered entries
-    filtered_entries = query.all()
-
-    # 🧮 Calculate performance stats
-    total_returns = sum(
-        (e.rrr_amount or 0) + (e.paydirect_amount or 0)
-        for e in filtered_entries
-        if e.rrr_verified or e.paydirect_verified
+    # Retrieve filtered entries (only the fields the stats and chart use)
+    # as one DataFrame, so every figure below is a column operation
+    df = pd.read_sql(
+        query.with_entities(
+            TaxEntry.date_uploaded,
+            TaxEntry.rrr_amount,
+            TaxEntry.paydirect_amount,
+            TaxEntry.rrr_verified,
+            TaxEntry.paydirect_verified
+        ).statement,
+        db.session.connection()
+    )
+    rrr_amounts = df['rrr_amount'].fillna(0)
+    paydirect_amounts = df['paydirect_amount'].fillna(0)
+    dates = pd.to_datetime(df['date_uploaded'])
+
+    # 🧮 Calculate performance stats (verified amounts only)
+    total_returns = float(
+        (rrr_amounts * df['rrr_verified'].fillna(False).astype(bool)).sum()
+        + (paydirect_amounts * df['paydirect_verified'].fillna(False).astype(bool)).sum()
     )
 
     target = get_target_for_ato(user)
     percent_met = round((total_returns / target * 100), 2) if target else 0
 
     # Last recorded entry date
-    last_entry = (
-        max((e.date_uploaded for e in filtered_entries), default=None)
-        .strftime("%Y-%m-%d")
-        if filtered_entries else "—"
-    )
+    last_entry = dates.max().strftime("%Y-%m-%d") if not df.empty else "—"
 
     # 📊 Data for Chart.js
-    chart_labels = [e.date_uploaded.strftime("%Y-%m-%d") for e in filtered_entries]
-    total_values = [
-        (e.rrr_amount or 0) + (e.paydirect_amount or 0) for e in filtered_entries
-    ]
-    ebills_values = [e.rrr_amount or 0 for e in filtered_entries]
-    paydirect_values = [e.paydirect_amount or 0 for e in filtered_entries]
+    chart_labels = dates.dt.strftime("%Y-%m-%d").tolist()
+    total_values = (rrr_amounts + paydirect_amounts).tolist()
+    ebills_values = rrr_amounts.tolist()
+    paydirect_values = paydirect_amounts.tolist()
 
     # 🧾 Render template
     return render_template(
@@ -1173,8 +1484,7 @@ def submit_entry():
     rrr = request.form.get('rrr')
     paydirect_ref = request.form.get('paydirect_ref')
 
-    rrr_result = verify_remita_rrr(rrr) if rrr else {"verified": False, "amount": 0}
-    paydirect_result = verify_paydirect_reference(paydirect_ref) if paydirect_ref else {"verified": False, "amount": 0}
+    rrr_result, paydirect_result = verify_payments(rrr, paydirect_ref)
 
     entry = TaxEntry(
         tax_item=request.form.get('tax_item'),
@@ -1186,12 +1496,15 @@ def submit_entry():
         paydirect_verified=paydirect_result.get('verified', False),
         rrr_amount=rrr_result.get('amount', 0),
         paydirect_amount=paydirect_result.get('amount', 0),
-        data=request.form.to_dict(),
-        date_uploaded=datetime.utcnow()
+        data=request.form.to_dict()
     )
     try:
         db.session.add(entry)
+        db.session.flush()
+        apply_monthly_summary_delta(entry.uploaded_by, entry.year, entry.month,
+                                    1, *verified_amounts(entry))
         db.session.commit()
+        invalidate_dashboard_cache()
         flash("Entry submitted successfully.", "success")
     except Exception as e:
         db.session.rollback()
@@ -1208,18 +1521,28 @@ def submit_entry():
 def reverify_entry(entry_id):
     entry = TaxEntry.query.get_or_404(entry_id)
 
+    rrr_result, paydirect_result = verify_payments(entry.rrr, entry.paydirect_ref)
+
+    # Lock the row and take its current amounts, so a concurrent reverify of
+    # the same entry can't apply the same rollup delta twice
+    db.session.refresh(entry, with_for_update=True)
+    old_rrr, old_paydirect = verified_amounts(entry)
+
     if entry.rrr:
-        rrr_result = verify_remita_rrr(entry.rrr)
         entry.rrr_verified = rrr_result.get('verified', False)
         entry.rrr_amount = rrr_result.get('amount', 0)
 
     if entry.paydirect_ref:
-        paydirect_result = verify_paydirect_reference(entry.paydirect_ref)
         entry.paydirect_verified = paydirect_result.get('verified', False)
         entry.paydirect_amount = paydirect_result.get('amount', 0)
 
     try:
+        db.session.flush()
+        new_rrr, new_paydirect = verified_amounts(entry)
+        apply_monthly_summary_delta(entry.uploaded_by, entry.year, entry.month,
+                                    0, new_rrr - old_rrr, new_paydirect - old_paydirect)
         db.session.commit()
+        invalidate_dashboard_cache()
         flash("Verification updated.", "success")
     except Exception as e:
         db.session.rollback()
@@ -1231,6 +1554,11 @@ def reverify_entry(entry_id):
 # -------------------------
 # Exports: Excel & PDF for user's submissions
 # -------------------------
+def _normalize_entry_data(data):
+    """Flatten a Series of TaxEntry.data dicts into one column per key."""
+    return pd.json_normalize([d or {} for d in data])
+
+
 @app.route('/export_excel')
 @login_required
 def export_excel():
@@ -1245,31 +1573,65 @@ def export_excel():
     if subhead:
         query = query.filter(TaxEntry.subhead.ilike(f"%{subhead}%"))
     if month:
-        query = query.filter(extract('month', TaxEntry.date_uploaded) == month)
-
-    entries = query.all()
-
-    data = []
-    for entry in entries:
-        row = {
-            'Tax Item': entry.tax_item,
-            'Subhead': entry.subhead or '',
-            'Date Uploaded': entry.date_uploaded.strftime('%Y-%m-%d'),
-            'RRR': entry.rrr or '',
-            'RRR Verified': 'Yes' if entry.rrr_verified else 'No',
-            'RRR Amount': entry.rrr_amount or 0,
-            'PayDirect Ref': entry.paydirect_ref or '',
-            'PayDirect Verified': 'Yes' if entry.paydirect_verified else 'No',
-            'PayDirect Amount': entry.paydirect_amount or 0,
-        }
-        if entry.data:
-            row.update(entry.data)
-        data.append(row)
+        query = query.filter(TaxEntry.month == month)
+
+    fixed_columns = ['Tax Item', 'Subhead', 'Date Uploaded', 'RRR', 'RRR Verified', 'RRR Amount',
+                     'PayDirect Ref', 'PayDirect Verified', 'PayDirect Amount']
+    query = query.order_by(TaxEntry.date_uploaded)
+    conn = db.session.connection()
+
+    # Free-form `data` keys become extra columns. A write-only sheet needs the
+    # header up front, so a first pass reads the `data` column (the bulk of
+    # each row) just to collect keys. The row pass is capped at the highest id
+    # that pass saw, so an entry committed in between can't bring a key that
+    # isn't in the header.
+    extra_columns = {}
+    last_id = 0
+    keys_statement = query.with_entities(TaxEntry.id, TaxEntry.data).statement
+    for chunk in pd.read_sql(keys_statement.execution_options(stream_results=True), conn, chunksize=1000):
+        if chunk.empty:
+            continue
+        extra_columns.update(dict.fromkeys(_normalize_entry_data(chunk['data']).columns))
+        last_id = max(last_id, int(chunk['id'].max()))
+
+    columns = fixed_columns + [c for c in extra_columns if c not in fixed_columns]
+
+    statement = query.filter(TaxEntry.id <= last_id).with_entities(
+        TaxEntry.tax_item.label('Tax Item'),
+        TaxEntry.subhead.label('Subhead'),
+        TaxEntry.date_uploaded.label('Date Uploaded'),
+        TaxEntry.rrr.label('RRR'),
+        TaxEntry.rrr_verified.label('RRR Verified'),
+        TaxEntry.rrr_amount.label('RRR Amount'),
+        TaxEntry.paydirect_ref.label('PayDirect Ref'),
+        TaxEntry.paydirect_verified.label('PayDirect Verified'),
+        TaxEntry.paydirect_amount.label('PayDirect Amount'),
+        TaxEntry.data
+    ).statement
+
+    # Stream chunks into a write-only workbook so memory stays bounded. pandas
+    # only slices the result into chunks; stream_results (on both passes) is
+    # what makes PostgreSQL/MySQL use a server-side cursor instead of
+    # buffering every row client-side. Each chunk is formatted column-wise
+    # rather than entry by entry
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Submissions')
+    ws.append(columns)
+    for chunk in pd.read_sql(statement.execution_options(stream_results=True), conn, chunksize=1000):
+        extras = _normalize_entry_data(chunk.pop('data'))
+        extras.index = chunk.index
+        chunk = chunk.fillna({'Subhead': '', 'RRR': '', 'PayDirect Ref': '', 'RRR Amount': 0, 'PayDirect Amount': 0})
+        chunk['Date Uploaded'] = pd.to_datetime(chunk['Date Uploaded']).dt.strftime('%Y-%m-%d')
+        for col in ('RRR Verified', 'PayDirect Verified'):
+            chunk[col] = chunk[col].map({True: 'Yes'}).fillna('No')
+        chunk = extras.combine_first(chunk)  # data keys win over fixed columns, as before
+
+        chunk = chunk.reindex(columns=columns).astype(object)
+        for row in chunk.where(chunk.notna(), None).itertuples(index=False, name=None):
+            ws.append(row)
 
-    df = pd.DataFrame(data)
     output = BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, sheet_name='Submissions')
+    wb.save(output)
     output.seek(0)
     return send_file(output, download_name='submissions.xlsx', as_attachment=True)
 
@@ -1277,9 +1639,7 @@ def export_excel():
 @app.route('/export_pdf')
 @login_required
 def export_pdf():
-    # NOTE: xhtml2pdf must be installed; this route uses a simple render_template_string as before
-    from xhtml2pdf import pisa
-    from io import BytesIO
+    # NOTE: the configured PDF_ENGINE (weasyprint or xhtml2pdf) must be installed
     from flask import render_template_string
 
     month = request.args.get('month', type=int)
@@ -1292,9 +1652,15 @@ def export_pdf():
     if subhead:
         query = query.filter(TaxEntry.subhead.ilike(f"%{subhead}%"))
     if month:
-        query = query.filter(extract('month', TaxEntry.date_uploaded) == month)
+        query = query.filter(TaxEntry.month == month)
 
-    entries = query.all()
+    # Only the columns the report shows
+    entries = query.with_entities(
+        TaxEntry.tax_item,
+        TaxEntry.subhead,
+        TaxEntry.date_uploaded,
+        TaxEntry.data
+    ).order_by(TaxEntry.date_uploaded).all()
 
     html = render_template_string("""
     <html>
@@ -1338,7 +1704,13 @@ def export_pdf():
     """, entries=entries)
 
     output = BytesIO()
-    pisa.CreatePDF(html, dest=output)
+    if app.config.get('PDF_ENGINE') == 'weasyprint':
+        # Cairo-backed renderer; far quicker than xhtml2pdf on long tables
+        from weasyprint import HTML
+        HTML(string=html).write_pdf(output)
+    else:
+        from xhtml2pdf import pisa
+        pisa.CreatePDF(html, dest=output)
     output.seek(0)
     return send_file(output, download_name='submissions.pdf', as_attachment=True)
 
@@ -4,4 +4,15 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY', 'your-secret-key')
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'sqlite:///birs.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Raise on lazy relationship loads in hot dashboard queries (enable in dev/tests)
+    STRICT_ORM = os.environ.get('STRICT_ORM', 'false').lower() == 'true'
+    # Short-lived cache for dashboard aggregates. Writes clear it, but
+    # SimpleCache is per process: with several workers, use a shared backend
+    # (e.g. RedisCache) or accept figures up to CACHE_DEFAULT_TIMEOUT old
+    CACHE_TYPE = os.environ.get('CACHE_TYPE', 'SimpleCache')
+    CACHE_DEFAULT_TIMEOUT = 60
+    # Expose Flask-MonitoringDashboard at /monitoring (needs the package installed)
+    MONITORING_DASHBOARD = os.environ.get('MONITORING_DASHBOARD', 'false').lower() == 'true'
+    # PDF renderer for export_pdf: 'weasyprint' (faster on large reports) or 'xhtml2pdf'
+    PDF_ENGINE = os.environ.get('PDF_ENGINE', 'xhtml2pdf').lower()
    
@@ -1,7 +1,9 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_migrate import Migrate
+from flask_caching import Cache
 
 db = SQLAlchemy()
 login_manager = LoginManager()
 migrate = Migrate()
+cache = Cache()
@@ -51,6 +51,15 @@ def get_metadata():
     return target_db.metadata
 
 
+# Indexes that exist only in migrations (the PostgreSQL pg_trgm GIN indexes
+# from e7a1c54b92d6), not in the models; keep autogenerate from dropping them
+UNMANAGED_INDEXES = {'ix_tax_tax_item_trgm', 'ix_tax_subhead_trgm'}
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    return not (type_ == 'index' and name in UNMANAGED_INDEXES)
+
+
 def run_migrations_offline():
     """Run migrations in 'offline' mode.
 
@@ -65,7 +74,8 @@ def run_migrations_offline():
     """
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
-        url=url, target_metadata=get_metadata(), literal_binds=True
+        url=url, target_metadata=get_metadata(), literal_binds=True,
+        include_object=include_object
     )
 
     with context.begin_transaction():
@@ -93,6 +103,8 @@ def run_migrations_online():
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    if conf_args.get("include_object") is None:
+        conf_args["include_object"] = include_object
 
     connectable = get_engine()
 
@@ -0,0 +1,30 @@
+"""Add tax_entry lookup indexes
+
+Revision ID: 3c8e1f2a9d47
+Revises: ebe9f1465820
+Create Date: 2026-10-15 09:12:31.418220
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c8e1f2a9d47'
+down_revision = 'ebe9f1465820'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Partial unique indexes uq_tax_entry_rrr / uq_tax_entry_paydirect_ref
+    # already exist (created in ebe9f1465820); only the lookup indexes are new.
+    with op.batch_alter_table('tax_entry', schema=None) as batch_op:
+        batch_op.create_index('ix_tax_uploaded_by_date', ['uploaded_by', 'date_uploaded'], unique=False)
+        batch_op.create_index('ix_tax_date_uploaded', ['date_uploaded'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('tax_entry', schema=None) as batch_op:
+        batch_op.drop_index('ix_tax_date_uploaded')
+        batch_op.drop_index('ix_tax_uploaded_by_date')
@@ -0,0 +1,43 @@
+"""Add monthly_summary rollup
+
+Revision ID: 5e07b9c4d812
+Revises: a6c93e5d1f28
+Create Date: 2026-10-15 16:05:52.274930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e07b9c4d812'
+down_revision = 'a6c93e5d1f28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('monthly_summary',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Integer(), nullable=False),
+    sa.Column('rrr_total', sa.Float(), nullable=True),
+    sa.Column('paydirect_total', sa.Float(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'year', 'month')
+    )
+
+    # Seed the rollup from existing entries
+    op.execute(
+        "INSERT INTO monthly_summary (user_id, year, month, rrr_total, paydirect_total) "
+        "SELECT uploaded_by, year, month, "
+        "SUM(CASE WHEN rrr_verified THEN COALESCE(rrr_amount, 0) ELSE 0 END), "
+        "SUM(CASE WHEN paydirect_verified THEN COALESCE(paydirect_amount, 0) ELSE 0 END) "
+        "FROM tax_entry "
+        "WHERE uploaded_by IS NOT NULL AND year IS NOT NULL AND month IS NOT NULL "
+        "GROUP BY uploaded_by, year, month"
+    )
+
+
+def downgrade():
+    op.drop_table('monthly_summary')
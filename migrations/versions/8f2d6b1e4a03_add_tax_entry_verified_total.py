@@ -0,0 +1,36 @@
+"""Add generated verified_total to tax_entry
+
+Revision ID: 8f2d6b1e4a03
+Revises: d41f7a0c2b95
+Create Date: 2026-10-15 13:27:05.611348
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8f2d6b1e4a03'
+down_revision = 'd41f7a0c2b95'
+branch_labels = None
+depends_on = None
+
+VERIFIED_TOTAL_SQL = (
+    "CASE WHEN rrr_verified THEN COALESCE(rrr_amount, 0) ELSE 0 END"
+    " + CASE WHEN paydirect_verified THEN COALESCE(paydirect_amount, 0) ELSE 0 END"
+)
+
+
+def upgrade():
+    with op.batch_alter_table('tax_entry', schema=None) as batch_op:
+        batch_op.add_column(sa.Column(
+            'verified_total', sa.Float(),
+            sa.Computed(VERIFIED_TOTAL_SQL, persisted=True), nullable=True
+        ))
+        batch_op.create_index('ix_tax_verified_total', ['uploaded_by', 'verified_total'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('tax_entry', schema=None) as batch_op:
+        batch_op.drop_index('ix_tax_verified_total')
+        batch_op.drop_column('verified_total')
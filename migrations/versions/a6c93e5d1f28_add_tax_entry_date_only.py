@@ -0,0 +1,34 @@
+"""Add date_only to tax_entry
+
+Revision ID: a6c93e5d1f28
+Revises: 8f2d6b1e4a03
+Create Date: 2026-10-15 14:41:19.083527
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6c93e5d1f28'
+down_revision = '8f2d6b1e4a03'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('tax_entry', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('date_only', sa.Date(), nullable=True))
+        batch_op.create_index('ix_tax_date_only', ['date_only'], unique=False)
+
+    # Backfill the calendar day for existing rows
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute("UPDATE tax_entry SET date_only = date(date_uploaded) WHERE date_uploaded IS NOT NULL")
+    else:
+        op.execute("UPDATE tax_entry SET date_only = CAST(date_uploaded AS DATE) WHERE date_uploaded IS NOT NULL")
+
+
+def downgrade():
+    with op.batch_alter_table('tax_entry', schema=None) as batch_op:
+        batch_op.drop_index('ix_tax_date_only')
+        batch_op.drop_column('date_only')
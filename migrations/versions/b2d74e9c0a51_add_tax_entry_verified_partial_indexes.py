@@ -0,0 +1,32 @@
+"""Add partial indexes on tax_entry verified flags
+
+Revision ID: b2d74e9c0a51
+Revises: 5e07b9c4d812
+Create Date: 2026-10-15 17:21:08.603114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b2d74e9c0a51'
+down_revision = '5e07b9c4d812'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('tax_entry', schema=None) as batch_op:
+        batch_op.create_index('ix_tax_rrr_verified', ['uploaded_by'], unique=False,
+                              sqlite_where=sa.text('rrr_verified'),
+                              postgresql_where=sa.text('rrr_verified'))
+        batch_op.create_index('ix_tax_paydirect_verified', ['uploaded_by'], unique=False,
+                              sqlite_where=sa.text('paydirect_verified'),
+                              postgresql_where=sa.text('paydirect_verified'))
+
+
+def downgrade():
+    with op.batch_alter_table('tax_entry', schema=None) as batch_op:
+        batch_op.drop_index('ix_tax_paydirect_verified')
+        batch_op.drop_index('ix_tax_rrr_verified')
@@ -0,0 +1,38 @@
+"""Add entry_count and updated_at to monthly_summary
+
+Revision ID: c5f0e8a3b716
+Revises: e7a1c54b92d6
+Create Date: 2026-10-15 19:12:37.540218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5f0e8a3b716'
+down_revision = 'e7a1c54b92d6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('monthly_summary', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('entry_count', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+    # Backfill from the entries already rolled up into each bucket
+    op.execute(
+        "UPDATE monthly_summary SET entry_count = ("
+        "SELECT COUNT(*) FROM tax_entry "
+        "WHERE tax_entry.uploaded_by = monthly_summary.user_id "
+        "AND tax_entry.year = monthly_summary.year "
+        "AND tax_entry.month = monthly_summary.month), "
+        "updated_at = CURRENT_TIMESTAMP"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('monthly_summary', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
+        batch_op.drop_column('entry_count')
@@ -0,0 +1,43 @@
+"""Index and backfill tax_entry month/year
+
+Revision ID: d41f7a0c2b95
+Revises: 3c8e1f2a9d47
+Create Date: 2026-10-15 11:03:47.902114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd41f7a0c2b95'
+down_revision = '3c8e1f2a9d47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Dashboards now group/filter on the stored month/year columns, so fill
+    # them in for rows that were saved without them.
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute(
+            "UPDATE tax_entry SET "
+            "month = CAST(strftime('%m', date_uploaded) AS INTEGER), "
+            "year = CAST(strftime('%Y', date_uploaded) AS INTEGER) "
+            "WHERE (month IS NULL OR year IS NULL) AND date_uploaded IS NOT NULL"
+        )
+    else:
+        op.execute(
+            "UPDATE tax_entry SET "
+            "month = EXTRACT(MONTH FROM date_uploaded), "
+            "year = EXTRACT(YEAR FROM date_uploaded) "
+            "WHERE (month IS NULL OR year IS NULL) AND date_uploaded IS NOT NULL"
+        )
+
+    with op.batch_alter_table('tax_entry', schema=None) as batch_op:
+        batch_op.create_index('ix_tax_year_month', ['year', 'month'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('tax_entry', schema=None) as batch_op:
+        batch_op.drop_index('ix_tax_year_month')
@@ -0,0 +1,40 @@
+"""Add trigram indexes on tax_entry tax_item/subhead
+
+Revision ID: e7a1c54b92d6
+Revises: b2d74e9c0a51
+Create Date: 2026-10-15 18:02:44.217390
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7a1c54b92d6'
+down_revision = 'b2d74e9c0a51'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The tax_item/subhead filters use ilike('%...%'), which a btree can't
+    # serve; pg_trgm GIN indexes can. PostgreSQL only, other backends keep
+    # scanning.
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index('ix_tax_tax_item_trgm', 'tax_entry', ['tax_item'], unique=False,
+                    postgresql_using='gin',
+                    postgresql_ops={'tax_item': 'gin_trgm_ops'})
+    op.create_index('ix_tax_subhead_trgm', 'tax_entry', ['subhead'], unique=False,
+                    postgresql_using='gin',
+                    postgresql_ops={'subhead': 'gin_trgm_ops'})
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.drop_index('ix_tax_subhead_trgm', table_name='tax_entry')
+    op.drop_index('ix_tax_tax_item_trgm', table_name='tax_entry')
@@ -1,7 +1,23 @@
 from datetime import datetime
+from sqlalchemy import event
 from extensions import db
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.security import check_password_hash
+from argon2 import PasswordHasher
+from argon2.exceptions import VerificationError, InvalidHashError
+
+# argon2id; verifying is much cheaper than werkzeug's 600k-round pbkdf2 default
+password_hasher = PasswordHasher(time_cost=2, memory_cost=65536, parallelism=2)
+# Checked against when a username doesn't exist so a miss takes as long as a hit
+DUMMY_PASSWORD_HASH = password_hasher.hash('dummy-password')
+
+
+def dummy_password_check(password):
+    try:
+        password_hasher.verify(DUMMY_PASSWORD_HASH, password)
+    except VerificationError:
+        pass
+    return False
 
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -10,10 +26,25 @@ class User(UserMixin, db.Model):
     role = db.Column(db.String(50), default='user')  # Optional: add role support
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        """Verify a password. Legacy werkzeug hashes (and argon2 hashes with
+        outdated parameters) are upgraded in place on success; the caller
+        commits."""
+        if not self.password_hash.startswith('$argon2'):
+            if not check_password_hash(self.password_hash, password):
+                return False
+            self.set_password(password)
+            return True
+
+        try:
+            password_hasher.verify(self.password_hash, password)
+        except (VerificationError, InvalidHashError):
+            return False
+        if password_hasher.check_needs_rehash(self.password_hash):
+            self.set_password(password)
+        return True
     performance_summaries = db.relationship('PerformanceSummary', backref='user', lazy=True)
 
 class PerformanceSummary(db.Model):
@@ -29,30 +60,86 @@ class PerformanceTarget(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
     target_amount = db.Column(db.Float)
-    user = db.relationship('User', backref=db.backref('target', uselist=False))
+    # one row per ATO and read on most pages, so load it with the user
+    user = db.relationship('User', backref=db.backref('target', uselist=False, lazy='joined'))
 
 
 
 class TaxEntry(db.Model):
+    __table_args__ = (
+        db.Index('ix_tax_uploaded_by_date', 'uploaded_by', 'date_uploaded'),
+        db.Index('ix_tax_date_uploaded', 'date_uploaded'),
+        db.Index('ix_tax_year_month', 'year', 'month'),
+        db.Index('ix_tax_verified_total', 'uploaded_by', 'verified_total'),
+        db.Index('ix_tax_date_only', 'date_only'),
+        # Partial indexes for per-ATO verified lookups (full index on MySQL)
+        db.Index('ix_tax_rrr_verified', 'uploaded_by',
+                 sqlite_where=db.text('rrr_verified'),
+                 postgresql_where=db.text('rrr_verified')),
+        db.Index('ix_tax_paydirect_verified', 'uploaded_by',
+                 sqlite_where=db.text('paydirect_verified'),
+                 postgresql_where=db.text('paydirect_verified')),
+        # Partial unique indexes: references are optional, but never reused
+        db.Index('uq_tax_entry_rrr', 'rrr', unique=True,
+                 sqlite_where=db.text('rrr IS NOT NULL'),
+                 postgresql_where=db.text('rrr IS NOT NULL')),
+        db.Index('uq_tax_entry_paydirect_ref', 'paydirect_ref', unique=True,
+                 sqlite_where=db.text('paydirect_ref IS NOT NULL'),
+                 postgresql_where=db.text('paydirect_ref IS NOT NULL')),
+        # PostgreSQL also has pg_trgm GIN indexes on tax_item/subhead for the
+        # ilike filters; they live only in migration e7a1c54b92d6 and are
+        # excluded from autogenerate in migrations/env.py
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     tax_item = db.Column(db.String(100))
     subhead = db.Column(db.String(100))
-    rrr = db.Column(db.String(100), unique=True, nullable=True)
-    paydirect_ref = db.Column(db.String(100), unique=True, nullable=True)
+    rrr = db.Column(db.String(100), nullable=True)
+    paydirect_ref = db.Column(db.String(100), nullable=True)
     rrr_verified = db.Column(db.Boolean, default=False)
     paydirect_verified = db.Column(db.Boolean, default=False)
     rrr_amount = db.Column(db.Float)
     paydirect_amount = db.Column(db.Float)
+    # Verified RRR + PayDirect amount, computed by the database on write
+    verified_total = db.Column(db.Float, db.Computed(
+        "CASE WHEN rrr_verified THEN COALESCE(rrr_amount, 0) ELSE 0 END"
+        " + CASE WHEN paydirect_verified THEN COALESCE(paydirect_amount, 0) ELSE 0 END",
+        persisted=True
+    ))
     uploaded_by = db.Column(db.Integer, db.ForeignKey('user.id'))
     user = db.relationship('User', backref='entries')
     data = db.Column(db.JSON)
     date_uploaded = db.Column(db.DateTime, default=datetime.utcnow)
+    date_only = db.Column(db.Date)  # calendar day of date_uploaded, for per-day grouping
     month = db.Column(db.Integer)  # ✅ NEW
     year = db.Column(db.Integer)   # ✅ NEW
 
+
+@event.listens_for(TaxEntry, 'before_insert')
+def _set_tax_entry_date_parts(mapper, connection, entry):
+    """date_only/month/year are stored copies of date_uploaded used for
+    grouping; derive them here so every insert path fills them."""
+    if entry.date_uploaded is None:
+        entry.date_uploaded = datetime.utcnow()
+    entry.date_only = entry.date_uploaded.date()
+    entry.month = entry.date_uploaded.month
+    entry.year = entry.date_uploaded.year
+
 class MonthlyLeagueSnapshot(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     month = db.Column(db.Integer)
     year = db.Column(db.Integer)
     data = db.Column(db.JSON)  # Store league table as JSON
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class MonthlySummary(db.Model):
+    # Verified totals per uploader per calendar month; every TaxEntry write
+    # upserts its delta into the affected bucket so dashboards don't rescan
+    # tax_entry
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    year = db.Column(db.Integer, primary_key=True)
+    month = db.Column(db.Integer, primary_key=True)
+    rrr_total = db.Column(db.Float, default=0)
+    paydirect_total = db.Column(db.Float, default=0)
+    entry_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)